@@ -0,0 +1,68 @@
+import struct
+from typing import Dict, List
+
+import orjson
+
+# String pools shared with the client. Frames carry indices into these
+# tuples instead of repeating the strings for every transaction.
+LOCATIONS = ('New York', 'London', 'Tokyo', 'Singapore', 'Dubai', 'Mumbai')
+DEVICES = ('Mobile', 'Desktop', 'Tablet', 'ATM')
+MERCHANTS = ('Amazon', 'Walmart', 'Starbucks', 'Shell', 'Apple', 'Target', 'Best Buy')
+THREAT_LEVELS = ('SAFE', 'MEDIUM', 'HIGH', 'CRITICAL')
+
+# Binary frame layout:
+#   [uint32 header length][JSON header][RECORD * n]
+# RECORD: amount, hour, velocity, geo_distance, risk_score, confidence, threat_level
+HEADER_LENGTH = struct.Struct('<I')
+RECORD = struct.Struct('<fBffffB')
+
+
+def schema_message() -> Dict:
+    """Message describing the string pools, sent once when a client connects"""
+    return {
+        'type': 'schema',
+        'locations': LOCATIONS,
+        'devices': DEVICES,
+        'merchants': MERCHANTS,
+        'threat_levels': THREAT_LEVELS,
+        'record_size': RECORD.size
+    }
+
+
+def encode_batch(transactions: List[Dict]) -> bytes:
+    """
+    Pack scored transactions into a single binary frame
+
+    Args:
+        transactions: Transactions generated together (sharing one timestamp) carrying pool indices (location_idx, device_idx,
+            merchant_idx) and model output (risk_score, threat_idx into THREAT_LEVELS, confidence)
+
+    Returns:
+        Frame bytes: header length, compact JSON header with the frame timestamp, ids and pool indices,
+        then one fixed-size record per transaction
+    """
+    header = {
+        'type': 'transaction_batch',
+        'id': [t['id'] for t in transactions],
+        'timestamp': transactions[0]['timestamp'],
+        'location': [t['location_idx'] for t in transactions],
+        'device': [t['device_idx'] for t in transactions],
+        'merchant': [t['merchant_idx'] for t in transactions],
+        'device_change': [int(t['features']['deviceChange']) for t in transactions]
+    }
+    header_bytes = orjson.dumps(header)
+
+    records = b''.join(
+        RECORD.pack(
+            t['amount'],
+            t['hour'],
+            t['velocity'],
+            t['geo_distance'],
+            t['risk_score'],
+            t['confidence'],
+            t['threat_idx']
+        )
+        for t in transactions
+    )
+
+    return HEADER_LENGTH.pack(len(header_bytes)) + header_bytes + records
@@ -1,125 +1,192 @@
 from fastapi import WebSocket, WebSocketDisconnect
-from typing import List
+from typing import Dict, Set
 import asyncio
-import random
+import time
 from datetime import datetime
 import logging
 
+import numpy as np
+import orjson
+
+from app.api.protocol import LOCATIONS, DEVICES, MERCHANTS, THREAT_LEVELS, encode_batch
+from app.core.config import settings
+
 logger = logging.getLogger(__name__)
 
 class ConnectionManager:
     """Manage WebSocket connections"""
     
     def __init__(self):
-        self.active_connections: List[WebSocket] = []
+        self.active_connections: Set[WebSocket] = set()
     
     async def connect(self, websocket: WebSocket):
         await websocket.accept()
-        self.active_connections.append(websocket)
+        self.active_connections.add(websocket)
         logger.info(f"✓ Client connected. Total connections: {len(self.active_connections)}")
     
     def disconnect(self, websocket: WebSocket):
         if websocket in self.active_connections:
-            self.active_connections.remove(websocket)
+            self.active_connections.discard(websocket)
             logger.info(f"✗ Client disconnected. Remaining: {len(self.active_connections)}")
     
     async def send_to_client(self, websocket: WebSocket, message: dict):
         """Send message to a specific client"""
         try:
-            await websocket.send_json(message)
+            # Text frame so the client can tell JSON messages from binary transaction frames
+            await websocket.send_text(orjson.dumps(message, option=orjson.OPT_SERIALIZE_NUMPY).decode())
         except Exception as e:
             logger.error(f"❌ Error sending to client: {e}")
+    
+    async def _send_bytes(self, websocket: WebSocket, payload: bytes):
+        """Send a binary frame, dropping the client if it fails or stalls past STREAM_SEND_TIMEOUT"""
+        try:
+            await asyncio.wait_for(websocket.send_bytes(payload), timeout=settings.STREAM_SEND_TIMEOUT)
+        except Exception as e:
+            if isinstance(e, asyncio.TimeoutError):
+                logger.warning("⏱ Client send timed out, disconnecting")
+            else:
+                logger.error(f"❌ Error sending to client: {e}")
+            self.disconnect(websocket)
+            try:
+                await asyncio.wait_for(websocket.close(), timeout=settings.STREAM_SEND_TIMEOUT)
+            except Exception:
+                pass
+    
+    async def broadcast(self, payload: bytes):
+        """Send the same binary frame to every connected client"""
+        # snapshot, clients may disconnect while the sends are in flight
+        await asyncio.gather(
+            *[self._send_bytes(websocket, payload) for websocket in list(self.active_connections)]
+        )
 
 manager = ConnectionManager()
 
-async def generate_transaction_stream(detector, websocket: WebSocket, client_id: int):
+rng = np.random.default_rng()
+
+_N_LOCATIONS = len(LOCATIONS)
+_N_DEVICES = len(DEVICES)
+_N_MERCHANTS = len(MERCHANTS)
+
+def draw_random_fields(count: int) -> Dict[str, list]:
     """
-    Generate realistic transaction stream for a specific client
+    Draw the random fields of `count` transactions with vectorized RNG calls
     
     Args:
-        detector: ML model detector
-        websocket: WebSocket connection
-        client_id: Unique client identifier
+        count: Number of transactions to draw
+    
+    Returns:
+        Mapping of field name to a list of `count` plain Python values
     """
-    logger.info(f"🎬 Starting transaction generator for client {client_id}")
+    is_anomaly_target = rng.random(count) < 0.12
     
-    locations = ['New York', 'London', 'Tokyo', 'Singapore', 'Dubai', 'Mumbai']
-    devices = ['Mobile', 'Desktop', 'Tablet', 'ATM']
-    merchants = ['Amazon', 'Walmart', 'Starbucks', 'Shell', 'Apple', 'Target', 'Best Buy']
+    return {
+        'amount': np.where(is_anomaly_target, rng.uniform(2000, 8000, count), rng.uniform(10, 200, count)).tolist(),
+        'hour': np.where(is_anomaly_target, rng.integers(2, 6, count), rng.integers(8, 23, count)).tolist(),
+        'velocity': np.where(is_anomaly_target, rng.uniform(8, 15, count), rng.uniform(0.5, 3, count)).tolist(),
+        'geo_distance': np.where(is_anomaly_target, rng.uniform(1000, 5000, count), rng.uniform(10, 500, count)).tolist(),
+        # indices into the protocol string pools, sent as-is in the frame header
+        'location_idx': rng.integers(0, _N_LOCATIONS, count).tolist(),
+        'device_idx': rng.integers(0, _N_DEVICES, count).tolist(),
+        'merchant_idx': rng.integers(0, _N_MERCHANTS, count).tolist(),
+        'confidence': (0.85 + rng.random(count) * 0.15).tolist(),
+        'device_change': (rng.random(count) > 0.7).tolist(),
+        'id_suffix': rng.integers(1000, 10000, count).tolist()
+    }
+
+async def generate_transaction_stream(detector):
+    """
+    Generate the realistic transaction stream shared by all connected clients
+    
+    Runs once per process; every frame is encoded once and broadcast to
+    all clients, so the work per tick does not grow with the client count.
+    
+    Args:
+        detector: ML model detector
+    """
+    logger.info("🎬 Starting transaction generator")
     
     transaction_count = 0
+    batch_size = settings.STREAM_BATCH_SIZE
+    # Frames are scheduled against a monotonic deadline so the time spent
+    # generating and scoring does not stretch the period
+    period = settings.STREAM_INTERVAL * batch_size
+    next_tick = time.monotonic()
     
     try:
         while True:
-            transaction_count += 1
+            # Nothing to generate for while no one is listening
+            if not manager.active_connections:
+                await asyncio.sleep(settings.STREAM_INTERVAL)
+                # restart the schedule rather than bursting to catch up
+                next_tick = time.monotonic()
+                continue
             
-            # Generate random transaction
-            is_anomaly_target = random.random() < 0.12
+            transaction_count += batch_size
             
-            if is_anomaly_target:
-                amount = random.uniform(2000, 8000)
-                hour = random.choice([2, 3, 4, 5])
-                velocity = random.uniform(8, 15)
-                geo_distance = random.uniform(1000, 5000)
-            else:
-                amount = random.uniform(10, 200)
-                hour = random.randint(8, 22)
-                velocity = random.uniform(0.5, 3)
-                geo_distance = random.uniform(10, 500)
+            # Generate one frame worth of random transactions
+            fields = draw_random_fields(batch_size)
             
-            transaction = {
-                'id': f'TXN_{datetime.now().strftime("%Y%m%d%H%M%S")}_{random.randint(1000, 9999)}',
-                'timestamp': datetime.now().isoformat(),
-                'amount': round(amount, 2),
-                'location': random.choice(locations),
-                'device': random.choice(devices),
-                'merchant': random.choice(merchants),
-                'hour': hour,
-                'velocity': velocity,
-                'geo_distance': geo_distance
-            }
+            # One timestamp and id prefix for the whole frame
+            now = datetime.now()
+            timestamp = now.isoformat()
+            id_prefix = f'TXN_{now.strftime("%Y%m%d%H%M%S")}_'
             
-            # Get ML prediction
-            try:
-                risk_score, is_anomaly, threat_level, explanation = detector.predict(transaction)
+            batch = []
+            for i in range(batch_size):
+                hour = fields['hour'][i]
+                velocity = fields['velocity'][i]
+                geo_distance = fields['geo_distance'][i]
                 
-                transaction['risk_score'] = float(risk_score)
-                transaction['is_anomaly'] = bool(is_anomaly)
-                transaction['threat_level'] = threat_level
-                transaction['confidence'] = float(0.85 + random.random() * 0.15)
-                transaction['features'] = {
+                batch.append({
+                    'id': f'{id_prefix}{fields["id_suffix"][i]}',
+                    'timestamp': timestamp,
+                    'amount': fields['amount'][i],
+                    'location_idx': fields['location_idx'][i],
+                    'device_idx': fields['device_idx'][i],
+                    'merchant_idx': fields['merchant_idx'][i],
+                    'hour': hour,
                     'velocity': velocity,
-                    'geoDist': geo_distance,
-                    'deviceChange': random.random() > 0.7,
-                    'unusual_time': hour < 6,
-                    'amount_spike': is_anomaly
-                }
-                
-                # Send to this specific client
-                message = {
-                    'type': 'transaction',
-                    'data': transaction
-                }
+                    'geo_distance': geo_distance,
+                    'confidence': fields['confidence'][i],
+                    'features': {
+                        'velocity': velocity,
+                        'geoDist': geo_distance,
+                        'deviceChange': fields['device_change'][i],
+                        'unusual_time': hour < 6
+                    }
+                })
+            
+            # Score the whole batch at once and send it as a single frame
+            try:
+                predictions = detector.predict_batch(batch)
                 
-                await manager.send_to_client(websocket, message)
+                for transaction, (risk_score, is_anomaly, threat_idx, explanation) in zip(batch, predictions):
+                    transaction['risk_score'] = risk_score
+                    transaction['is_anomaly'] = is_anomaly
+                    transaction['threat_idx'] = threat_idx
+                    transaction['features']['amount_spike'] = is_anomaly
+                    
+                    # Log anomalies
+                    if is_anomaly:
+                        logger.warning(f"🚨 ANOMALY detected! ${transaction['amount']:.2f} - {THREAT_LEVELS[threat_idx]}")
                 
-                # Log every 10th transaction
-                if transaction_count % 10 == 0:
-                    logger.info(f"📊 Client {client_id}: Sent {transaction_count} transactions, last: ${amount:.2f} ({threat_level})")
+                await manager.broadcast(encode_batch(batch))
                 
-                # Log anomalies
-                if is_anomaly:
-                    logger.warning(f"🚨 Client {client_id}: ANOMALY detected! ${amount:.2f} - {threat_level}")
+                last = batch[-1]
+                logger.info(f"📊 Broadcast {transaction_count} transactions, last: ${last['amount']:.2f} ({THREAT_LEVELS[last['threat_idx']]})")
                 
             except Exception as e:
-                logger.error(f"❌ Error generating transaction for client {client_id}: {e}")
+                logger.error(f"❌ Error scoring transactions: {e}")
             
-            # Wait before next transaction (1.2 seconds)
-            await asyncio.sleep(1.2)
+            # Wait for the frame's share of the stream (one transaction per interval)
+            next_tick += period
+            delay = next_tick - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
             
     except asyncio.CancelledError:
-        logger.info(f"🛑 Stream generator cancelled for client {client_id} after {transaction_count} transactions")
+        logger.info(f"🛑 Stream generator cancelled after {transaction_count} transactions")
         raise
     except Exception as e:
-        logger.error(f"❌ Fatal error in stream for client {client_id}: {e}")
+        logger.error(f"❌ Fatal error in stream: {e}")
         raise
\ No newline at end of file
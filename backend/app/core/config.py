@@ -7,6 +7,18 @@ class Settings(BaseSettings):
     PROJECT_NAME: str = "Sentinel AI"
     VERSION: str = "4.2.0"
     MODEL_PATH: str = "data/trained_model.pkl"
+    # Scoring backend: "numba" (default), "onnx" (needs onnxruntime and the
+    # trained_model.onnx exported next to MODEL_PATH), "treelite" (needs
+    # tl2cgen from requirements-train.txt and the trained_model.so compiled
+    # next to MODEL_PATH on the serving machine) or "sklearn"
+    MODEL_BACKEND: str = "numba"
+    
+    # Transaction stream - one transaction per interval on average, sent to
+    # clients as a single frame of STREAM_BATCH_SIZE transactions
+    STREAM_INTERVAL: float = 1.2
+    STREAM_BATCH_SIZE: int = 5
+    # Seconds a client may take to accept a frame before it is disconnected
+    STREAM_SEND_TIMEOUT: float = 1.0
     
     # CORS - allow your frontend domain
     BACKEND_CORS_ORIGINS: list = [
@@ -0,0 +1,43 @@
+from uvicorn.protocols.websockets.websockets_impl import WebSocketProtocol
+from websockets import frames
+from websockets.extensions.permessage_deflate import PerMessageDeflate, ServerPerMessageDeflateFactory
+
+
+class TextOnlyPerMessageDeflate(PerMessageDeflate):
+    """permessage-deflate that leaves binary frames uncompressed"""
+
+    def encode(self, frame: frames.Frame) -> frames.Frame:
+        # Binary transaction frames are already dense packed floats
+        if frame.opcode is frames.OP_BINARY:
+            return frame
+        return super().encode(frame)
+
+
+class TextOnlyPerMessageDeflateFactory(ServerPerMessageDeflateFactory):
+    def process_request_params(self, params, accepted_extensions):
+        response_params, extension = super().process_request_params(params, accepted_extensions)
+        return response_params, TextOnlyPerMessageDeflate(
+            extension.remote_no_context_takeover,
+            extension.local_no_context_takeover,
+            extension.remote_max_window_bits,
+            extension.local_max_window_bits,
+            extension.compress_settings
+        )
+
+
+class DeflateWebSocketProtocol(WebSocketProtocol):
+    """
+    uvicorn's websockets protocol, negotiating permessage-deflate without
+    context takeover on either side so no zlib state is kept per connection
+    between messages
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if self.config.ws_per_message_deflate:
+            self.available_extensions = [
+                TextOnlyPerMessageDeflateFactory(
+                    server_no_context_takeover=True,
+                    client_no_context_takeover=True
+                )
+            ]
@@ -0,0 +1,90 @@
+import numpy as np
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+
+def _average_path_length(n_samples: np.ndarray) -> np.ndarray:
+    """Average path length of an unsuccessful BST search over n samples (same as sklearn)"""
+    n_samples = np.asarray(n_samples, dtype=np.float64)
+    path_length = np.zeros_like(n_samples)
+    path_length[n_samples == 2] = 1.0
+    mask = n_samples > 2
+    path_length[mask] = (
+        2.0 * (np.log(n_samples[mask] - 1.0) + np.euler_gamma)
+        - 2.0 * (n_samples[mask] - 1.0) / n_samples[mask]
+    )
+    return path_length
+
+
+if NUMBA_AVAILABLE:
+    @njit(cache=True)
+    def _iforest_depths(X, feature, threshold, left, right, path_length):
+        n_samples = X.shape[0]
+        n_trees = feature.shape[0]
+        depths = np.zeros(n_samples)
+        for i in range(n_samples):
+            total = 0.0
+            for t in range(n_trees):
+                node = 0
+                while left[t, node] != -1:
+                    if X[i, feature[t, node]] <= threshold[t, node]:
+                        node = left[t, node]
+                    else:
+                        node = right[t, node]
+                total += path_length[t, node]
+            depths[i] = total
+        return depths
+
+
+class FlatIsolationForest:
+    """
+    IsolationForest flattened into padded (n_trees, max_nodes) arrays and
+    scored with a Numba kernel. score_samples matches sklearn's output.
+    """
+
+    def __init__(self, model):
+        trees = [estimator.tree_ for estimator in model.estimators_]
+        n_trees = len(trees)
+        max_nodes = max(tree.node_count for tree in trees)
+
+        self.feature = np.zeros((n_trees, max_nodes), dtype=np.int32)
+        self.threshold = np.zeros((n_trees, max_nodes), dtype=np.float32)
+        self.left = np.full((n_trees, max_nodes), -1, dtype=np.int32)
+        self.right = np.full((n_trees, max_nodes), -1, dtype=np.int32)
+        # depth of each node plus the expected remaining depth of its leaf samples
+        self.path_length = np.zeros((n_trees, max_nodes), dtype=np.float64)
+
+        for t, (tree, features) in enumerate(zip(trees, model.estimators_features_)):
+            n = tree.node_count
+            is_split = tree.children_left != -1
+            self.feature[t, :n] = np.where(is_split, np.asarray(features)[np.maximum(tree.feature, 0)], 0)
+            self.threshold[t, :n] = tree.threshold
+            self.left[t, :n] = tree.children_left
+            self.right[t, :n] = tree.children_right
+
+            depth = np.zeros(n, dtype=np.float64)
+            for node in range(n):
+                if is_split[node]:
+                    depth[tree.children_left[node]] = depth[node] + 1
+                    depth[tree.children_right[node]] = depth[node] + 1
+            self.path_length[t, :n] = depth + _average_path_length(tree.n_node_samples)
+
+        self.n_features = model.n_features_in_
+        self.denominator = n_trees * _average_path_length([model.max_samples_])[0]
+
+    def score_samples(self, X: np.ndarray) -> np.ndarray:
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        depths = _iforest_depths(X, self.feature, self.threshold, self.left, self.right, self.path_length)
+        if self.denominator == 0:
+            # sklearn treats the depth ratio as 1 here
+            return -0.5 * np.ones(X.shape[0])
+        return -(2 ** (-depths / self.denominator))
+
+    def warmup(self):
+        """Compile (or load from cache) the kernel now rather than on the first transaction"""
+        self.score_samples(np.zeros((1, self.n_features)))
+
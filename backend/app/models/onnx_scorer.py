@@ -0,0 +1,28 @@
+import numpy as np
+import logging
+
+logger = logging.getLogger(__name__)
+
+try:
+    import onnxruntime
+    ONNXRUNTIME_AVAILABLE = True
+except ImportError:
+    ONNXRUNTIME_AVAILABLE = False
+
+
+class OnnxIsolationForest:
+    """
+    IsolationForest exported by train_model.py and served with ONNX Runtime.
+    score_samples matches sklearn's output.
+    """
+
+    def __init__(self, onnx_path: str, model):
+        self.session = onnxruntime.InferenceSession(onnx_path, providers=['CPUExecutionProvider'])
+        self.input_name = self.session.get_inputs()[0].name
+        # the exported 'scores' output is decision_function = score_samples - offset_
+        self.offset = model.offset_
+
+    def score_samples(self, X: np.ndarray) -> np.ndarray:
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        scores = self.session.run(['scores'], {self.input_name: X})[0]
+        return scores.ravel() + self.offset
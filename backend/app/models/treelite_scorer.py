@@ -0,0 +1,22 @@
+import numpy as np
+
+try:
+    import tl2cgen
+    TL2CGEN_AVAILABLE = True
+except ImportError:
+    TL2CGEN_AVAILABLE = False
+
+
+class TreeliteIsolationForest:
+    """
+    IsolationForest compiled to a shared library by train_model.py (treelite + tl2cgen).
+    score_samples matches sklearn's output.
+    """
+
+    def __init__(self, lib_path: str):
+        self.predictor = tl2cgen.Predictor(lib_path, nthread=1)
+
+    def score_samples(self, X: np.ndarray) -> np.ndarray:
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        # the compiled model outputs the anomaly score, the negation of score_samples
+        return -self.predictor.predict(tl2cgen.DMatrix(X)).ravel()
@@ -34,6 +34,36 @@ def create_training_data():
     
     return df
 
+def export_onnx(model, n_features, onnx_path):
+    """Export the fitted model for ONNX Runtime; skipped if skl2onnx is not installed"""
+    try:
+        from skl2onnx import convert_sklearn
+        from skl2onnx.common.data_types import FloatTensorType
+    except ImportError:
+        print("skl2onnx not installed, skipping ONNX export")
+        return None
+    
+    onx = convert_sklearn(
+        model,
+        initial_types=[('X', FloatTensorType([None, n_features]))],
+        target_opset={'': 15, 'ai.onnx.ml': 3}
+    )
+    onnx_path.write_bytes(onx.SerializeToString())
+    return onnx_path
+
+def export_treelite(model, lib_path):
+    """Compile the fitted model to a shared library; skipped if treelite/tl2cgen are not installed"""
+    try:
+        import tl2cgen
+        import treelite.sklearn
+    except ImportError:
+        print("treelite/tl2cgen not installed, skipping model compilation")
+        return None
+    
+    tl_model = treelite.sklearn.import_model(model)
+    tl2cgen.export_lib(tl_model, toolchain='gcc', libpath=str(lib_path), params={'parallel_comp': 4})
+    return lib_path
+
 def train_model():
     print("Training Isolation Forest model...")
     
@@ -41,12 +71,16 @@ def train_model():
     X = df.drop('is_fraud', axis=1)
     
     scaler = StandardScaler()
-    X_scaled = scaler.fit_transform(X)
+    X_scaled = scaler.fit_transform(X).astype(np.float32)
     
+    # max_samples=256 is the subsample size recommended by Liu et al.; it
+    # bounds tree depth and therefore the per-prediction walk length
     model = IsolationForest(
         contamination=0.15,
         random_state=42,
-        n_estimators=100
+        n_estimators=100,
+        max_samples=256,
+        n_jobs=-1
     )
     model.fit(X_scaled)
     
@@ -62,6 +96,8 @@ def train_model():
     model_path = data_dir / "trained_model.pkl"
 
     joblib.dump(model_data, str(model_path))
+    onnx_path = export_onnx(model, X_scaled.shape[1], data_dir / "trained_model.onnx")
+    lib_path = export_treelite(model, data_dir / "trained_model.so")
     
     predictions = model.predict(X_scaled)
     anomalies = (predictions == -1).sum()
@@ -70,6 +106,10 @@ def train_model():
     print(f"  - Training samples: {len(X)}")
     print(f"  - Detected anomalies: {anomalies} ({anomalies/len(X)*100:.1f}%)")
     print(f"  - Model saved to: {model_path}")
+    if onnx_path:
+        print(f"  - ONNX model saved to: {onnx_path}")
+    if lib_path:
+        print(f"  - Compiled model saved to: {lib_path}")
 
 if __name__ == "__main__":
     train_model()
\ No newline at end of file
@@ -5,6 +5,54 @@ import { AlertTriangle, Shield, Zap, TrendingUp, Activity, Eye, Brain, Sparkles,
 const DEFAULT_WS_PROTOCOL = (typeof window !== 'undefined' && window.location && window.location.protocol === 'https:') ? 'wss:' : 'ws:';
 const BACKEND_URL = process.env.REACT_APP_WS_URL || `${DEFAULT_WS_PROTOCOL}//${(typeof window !== 'undefined' ? window.location.host : 'localhost:8000')}/ws/stream`;
 
+// Binary transaction frame: [uint32 header length][JSON header][22-byte records]
+// Record layout (little-endian): amount f32, hour u8, velocity f32, geo_distance f32,
+// risk_score f32, confidence f32, threat_level u8
+const RECORD_SIZE = 22;
+const textDecoder = new TextDecoder();
+
+const decodeTransactionBatch = (buffer, schema) => {
+  const view = new DataView(buffer);
+  const headerLength = view.getUint32(0, true);
+  const header = JSON.parse(textDecoder.decode(new Uint8Array(buffer, 4, headerLength)));
+  const recordSize = schema.record_size || RECORD_SIZE;
+  const transactions = [];
+
+  for (let i = 0; i < header.id.length; i++) {
+    const offset = 4 + headerLength + i * recordSize;
+    const hour = view.getUint8(offset + 4);
+    const velocity = view.getFloat32(offset + 5, true);
+    const geoDistance = view.getFloat32(offset + 9, true);
+    const threatLevel = schema.threat_levels[view.getUint8(offset + 21)];
+    const isAnomaly = threatLevel === 'HIGH' || threatLevel === 'CRITICAL';
+
+    transactions.push({
+      id: header.id[i],
+      timestamp: header.timestamp,
+      amount: view.getFloat32(offset, true),
+      location: schema.locations[header.location[i]],
+      device: schema.devices[header.device[i]],
+      merchant: schema.merchants[header.merchant[i]],
+      hour,
+      velocity,
+      geo_distance: geoDistance,
+      risk_score: view.getFloat32(offset + 13, true),
+      confidence: view.getFloat32(offset + 17, true),
+      threat_level: threatLevel,
+      is_anomaly: isAnomaly,
+      features: {
+        velocity,
+        geoDist: geoDistance,
+        deviceChange: header.device_change[i] === 1,
+        unusual_time: hour < 6,
+        amount_spike: isAnomaly
+      }
+    });
+  }
+
+  return transactions;
+};
+
 const FraudDetectionCommand = () => {
   const [transactions, setTransactions] = useState([]);
   const [anomalies, setAnomalies] = useState([]);
@@ -23,6 +71,7 @@ const FraudDetectionCommand = () => {
   const canvasRef = useRef(null);
   const particlesRef = useRef([]);
   const wsRef = useRef(null);
+  const schemaRef = useRef(null);
   const reconnectTimeoutRef = useRef(null);
 
   // Particle system for background
@@ -80,6 +129,39 @@ const FraudDetectionCommand = () => {
     return () => window.removeEventListener('resize', handleResize);
   }, []);
 
+  // Apply a batch of transactions received in one frame
+  const handleTransactions = (batch) => {
+    if (!batch.length) return;
+    const last = batch[batch.length - 1];
+    console.log('💳 Transactions received:', batch.length, 'Last:', last.id, 'Amount:', last.amount);
+    
+    // Add to transactions
+    setTransactions(prev => {
+      const updated = [...prev, ...batch].slice(-100);
+      return updated;
+    });
+    
+    // If anomaly, add to anomalies list
+    const flagged = batch.filter(t => t.is_anomaly);
+    if (flagged.length) {
+      console.log('🚨 ANOMALY DETECTED:', flagged.map(t => t.threat_level).join(', '));
+      setAnomalies(prev => [...prev, ...flagged].slice(-8));
+      setPulseEffect(true);
+      setTimeout(() => setPulseEffect(false), 300);
+    }
+    
+    // Update stats
+    setStats(prev => ({
+      total: prev.total + batch.length,
+      blocked: prev.blocked + flagged.length,
+      saved: prev.saved + flagged.reduce((sum, t) => sum + t.amount, 0),
+      accuracy: 98.4 + (Math.random() - 0.5) * 0.2,
+      threats: prev.threats + batch.filter(t => t.threat_level === 'CRITICAL').length
+    }));
+    
+    setLastMessage(`Transaction ${last.id}`);
+  };
+
   // WebSocket connection with improved handling
   const connectWebSocket = () => {
     // Prevent multiple connections
@@ -98,6 +180,7 @@ const FraudDetectionCommand = () => {
 
     try {
       const ws = new WebSocket(BACKEND_URL);
+      ws.binaryType = 'arraybuffer';
       
       ws.onopen = () => {
         console.log('✓ WebSocket connected successfully!');
@@ -111,9 +194,23 @@ const FraudDetectionCommand = () => {
 
       ws.onmessage = (event) => {
         try {
+          if (event.data instanceof ArrayBuffer) {
+            if (!schemaRef.current) {
+              console.warn('⚠️ Binary frame received before schema, dropping');
+              return;
+            }
+            handleTransactions(decodeTransactionBatch(event.data, schemaRef.current));
+            return;
+          }
+          
           console.log('📨 Received message:', event.data.substring(0, 100) + '...');
           const message = JSON.parse(event.data);
           
+          if (message.type === 'schema') {
+            schemaRef.current = message;
+            return;
+          }
+          
           if (message.type === 'pong') {
             console.log('🏓 Pong received');
             setLastMessage('Connection alive');
@@ -121,33 +218,11 @@ const FraudDetectionCommand = () => {
           }
           
           if (message.type === 'transaction') {
-            const transaction = message.data;
-            console.log('💳 Transaction received:', transaction.id, 'Amount:', transaction.amount);
-            
-            // Add to transactions
-            setTransactions(prev => {
-              const updated = [...prev, transaction].slice(-100);
-              return updated;
-            });
-            
-            // If anomaly, add to anomalies list
-            if (transaction.is_anomaly) {
-              console.log('🚨 ANOMALY DETECTED:', transaction.threat_level);
-              setAnomalies(prev => [...prev, transaction].slice(-8));
-              setPulseEffect(true);
-              setTimeout(() => setPulseEffect(false), 300);
-            }
-            
-            // Update stats
-            setStats(prev => ({
-              total: prev.total + 1,
-              blocked: transaction.is_anomaly ? prev.blocked + 1 : prev.blocked,
-              saved: transaction.is_anomaly ? prev.saved + transaction.amount : prev.saved,
-              accuracy: 98.4 + (Math.random() - 0.5) * 0.2,
-              threats: transaction.threat_level === 'CRITICAL' ? prev.threats + 1 : prev.threats
-            }));
-            
-            setLastMessage(`Transaction ${transaction.id}`);
+            handleTransactions([message.data]);
+          }
+          
+          if (message.type === 'transaction_batch') {
+            handleTransactions(message.data);
           }
         } catch (error) {
           console.error('❌ Error parsing message:', error);